@@ -0,0 +1,160 @@
+"""
+Startup time benchmark for moonshots entry points.
+
+Measures import time of each entry point in a fresh interpreter and, with --live, time from
+interpreter start until each entry point receives its first market data message. Exits non-zero
+if any entry point is over its budget, so it can run in CI or before deploying to supervisors.
+
+    python benchmarks/startup.py [--live] [--repeat N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# entry point module -> import budget in seconds
+IMPORT_BUDGETS = {
+    'moonshots.hyperliquid.scraper': 0.25,
+    'moonshots.hyperliquid.shm': 0.5,
+    'moonshots.hyperliquid.hub': 0.5,
+    'moonshots.hyperliquid.bots.position_bot': 0.5,
+    'moonshots.hyperliquid.bots.mean_reversion_bot.mean_reversion_bot': 0.5,
+}
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+# entry point module -> (script printing seconds from interpreter start to first message, budget in seconds)
+# each script builds the entry point the way it runs in production and waits for the first message it consumes
+FIRST_MESSAGE = {
+    'moonshots.hyperliquid.scraper': ("""
+import time
+start = time.perf_counter()
+import asyncio
+from moonshots.hyperliquid.scraper import Scraper
+
+async def main():
+    scraper = Scraper()
+    first = asyncio.Event()
+    await scraper.connect_ws()
+    await scraper.ws.subscribe({"type": "allMids"}, lambda msg: first.set())
+    await first.wait()
+    print(time.perf_counter() - start)
+    await scraper.ws.close()
+
+asyncio.run(main())
+""", 1.0),
+    'moonshots.hyperliquid.shm': ("""
+import time
+start = time.perf_counter()
+from moonshots.hyperliquid.shm import IngestionProcess, ShmReader
+
+if __name__ == "__main__":
+    process = IngestionProcess(None)
+    process.start()
+    reader = ShmReader(process.shm_name)
+    while not len(reader.poll()):
+        time.sleep(0.001)
+    print(time.perf_counter() - start)
+    process.terminate()
+    reader.close()
+    process.unlink()
+""", 2.0),
+    'moonshots.hyperliquid.hub': ("""
+import time
+start = time.perf_counter()
+import asyncio
+from moonshots.hyperliquid.hub import MarketDataHub
+
+async def main():
+    hub = MarketDataHub()
+    first = asyncio.Event()
+    await hub.connect()
+    await hub.subscribe({"type": "allMids"}, lambda msg: first.set())
+    await first.wait()
+    print(time.perf_counter() - start)
+    await hub.close()
+
+asyncio.run(main())
+""", 1.5),
+    'moonshots.hyperliquid.bots.position_bot': ("""
+import time
+start = time.perf_counter()
+import asyncio
+from moonshots.hyperliquid.bots.position_bot import PositionAlgo
+
+async def main():
+    bot = PositionAlgo("BTC", "1m")
+    first = asyncio.Event()
+    await bot.ws.connect()
+    await bot.ws.subscribe({"type": "candle", "coin": bot.coin, "interval": bot.freq}, lambda msg: first.set())
+    await first.wait()
+    print(time.perf_counter() - start)
+    await bot.ws.close()
+    await bot.client.close()
+
+asyncio.run(main())
+""", 1.5),
+    'moonshots.hyperliquid.bots.mean_reversion_bot.mean_reversion_bot': ("""
+import time
+start = time.perf_counter()
+import asyncio
+from moonshots.hyperliquid.bots.mean_reversion_bot.mean_reversion_bot import MeanReversionBot
+
+async def main():
+    bot = MeanReversionBot("config.json")
+    first = asyncio.Event()
+    await bot.ws.connect()
+    await bot.ws.subscribe({"type": "allMids"}, lambda msg: first.set())
+    await first.wait()
+    print(time.perf_counter() - start)
+    await bot.ws.close()
+    await bot.client.close()
+
+asyncio.run(main())
+""", 1.5),
+}
+
+
+def run(script: str) -> float:
+    """Run script in a fresh interpreter, returns the seconds it prints"""
+    out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure(script: str, repeat: int) -> float:
+    """Median over repeated fresh interpreters"""
+    return statistics.median(run(script) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--live', action='store_true', help='also measure time to first websocket message')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'entry point':<80} {'seconds':>8} {'budget':>8}")
+    for module, budget in IMPORT_BUDGETS.items():
+        seconds = measure(IMPORT_SCRIPT.format(module=module), args.repeat)
+        print(f"{'import ' + module:<80} {seconds:>8.3f} {budget:>8.3f}")
+        if seconds > budget:
+            over_budget.append(module)
+    if args.live:
+        for module, (script, budget) in FIRST_MESSAGE.items():
+            seconds = measure(script, args.repeat)
+            print(f"{'first message ' + module:<80} {seconds:>8.3f} {budget:>8.3f}")
+            if seconds > budget:
+                over_budget.append(f'first message {module}')
+
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Per tick CPU benchmark for the MeanReversionBot allMids path.
+
+Compares the dict based tick the bot used to run (orjson loads, float() per mid, per coin EWMA
+loop in Python) with the current one (FrameDecoder into a mids array, one vectorised EWMA step
+over the decoder's coin indices). Exits non-zero if the vectorised tick is not faster.
+
+    python benchmarks/ticks.py [--coins N] [--ticks N] [--repeat N]
+"""
+import argparse
+import statistics
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from moonshots.hyperliquid.bots.mean_reversion_bot.mean_reversion_bot import MeanReversionBot
+from moonshots.utils.json import dumps, loads
+
+ALPHA = 2 / 101
+
+
+class DictState:
+    """Baseline: per coin state in dicts, updated coin by coin"""
+    def __init__(self):
+        self.rolling_means = {}
+        self.rolling_std = {}
+        self.z_scores = {}
+        self.signals = {}
+        self.last_prices = {}
+        self.last_time = time.time()
+
+    def on_mids_update(self, frame: bytes):
+        msg = loads(frame)
+        self.update_prices({coin: float(price) for coin, price in msg['data']['mids'].items()}, time.time())
+
+    def update_prices(self, prices: dict, timestamp: float):
+        time_diff_minutes = (timestamp - self.last_time) / 60
+        adjusted_alpha = 1 - (1 - ALPHA) ** time_diff_minutes
+        self.last_time = timestamp
+        for coin, price in prices.items():
+            self.last_prices[coin] = price
+            if coin not in self.rolling_means:
+                self.rolling_means[coin] = price
+            else:
+                self.rolling_means[coin] = adjusted_alpha * price + (1 - adjusted_alpha) * self.rolling_means[coin]
+            if coin not in self.rolling_std:
+                self.rolling_std[coin] = 0.0
+            else:
+                deviation = price - self.rolling_means[coin]
+                self.rolling_std[coin] = np.sqrt(
+                    adjusted_alpha * deviation ** 2 + (1 - adjusted_alpha) * self.rolling_std[coin] ** 2
+                )
+                self.z_scores[coin] = (price - self.rolling_means[coin]) / self.rolling_std[coin] if self.rolling_std[coin] > 0 else 0.0
+        mean_z_score = np.mean(list(self.z_scores.values()))
+        self.signals = {k: v - mean_z_score for k, v in self.z_scores.items()}
+
+
+def make_frames(n_coins: int, n_frames: int = 16) -> list[bytes]:
+    """allMids frames with random walk mids formatted as the exchange sends them"""
+    rng = np.random.default_rng(0)
+    coins = [f'COIN{i}' for i in range(n_coins)]
+    px = rng.uniform(0.01, 1000, n_coins)
+    frames = []
+    for _ in range(n_frames):
+        px = px * np.exp(rng.normal(0, 0.001, n_coins))
+        frames.append(dumps({'channel': 'allMids', 'data': {'mids': {coin: f'{p:.6g}' for coin, p in zip(coins, px)}}}).encode())
+    return frames
+
+
+def time_ticks(tick, frames: list[bytes], ticks: int) -> float:
+    """Mean milliseconds per tick"""
+    for frame in frames:
+        tick(frame)  # warm up and let both sides see every coin
+    start = time.perf_counter()
+    for i in range(ticks):
+        tick(frames[i % len(frames)])
+    return (time.perf_counter() - start) / ticks * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--coins', type=int, default=450)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # the baseline takes the mean of no z-scores on its first tick, as the bot used to
+    warnings.simplefilter('ignore', RuntimeWarning)
+    frames = make_frames(args.coins)
+    baseline = DictState()
+    bot = MeanReversionBot(config_path='')
+    bot.config = {'alpha': ALPHA}
+
+    def vectorised(frame: bytes):
+        bot.on_mids_update(bot.decoder.decode(frame))
+
+    results = {
+        'dict per coin (baseline)': statistics.median(time_ticks(baseline.on_mids_update, frames, args.ticks) for _ in range(args.repeat)),
+        'decoder + vectorised EWMA': statistics.median(time_ticks(vectorised, frames, args.ticks) for _ in range(args.repeat)),
+    }
+    print(f"{'allMids tick, ' + str(args.coins) + ' coins':<40} {'ms/tick':>8}")
+    for name, ms in results.items():
+        print(f"{name:<40} {ms:>8.3f}")
+    base, new = results.values()
+    print(f"speedup {base / new:.1f}x")
+    if new >= base:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def xy_group(
@@ -11,4 +12,85 @@ def xy_group(
     groups = pd.qcut(x, n, labels=False, duplicates='drop')
     x_grouped = x.groupby(groups).mean()
     y_grouped = y.groupby(groups).mean()
-    return x_grouped, y_grouped
\ No newline at end of file
+    return x_grouped, y_grouped
+
+class StreamingXYGroup:
+    """
+    Single pass, mergeable approximation of xy_group for data that doesn't fit in memory.
+
+    x is binned on a log scale (DDSketch style) so that every value in a bin is within
+    relative_accuracy of the others, and each bin keeps running count, sum x, sum y and sum y^2.
+    Quantile buckets are formed from whole bins at the end, so bucket edges are approximate
+    but bucket means and standard errors are exact for the rows assigned to them.
+    Memory is bounded by the number of bins, not the number of rows.
+    """
+    STATS = ['count', 'sum_x', 'sum_y', 'sum_y2']
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.log_gamma = np.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.min_key = int(np.floor(np.log(min_value) / self.log_gamma))
+        self.bins = pd.DataFrame(columns=self.STATS, dtype=float)
+
+    def keys(self, x: np.ndarray) -> np.ndarray:
+        """Signed bin keys, monotone in x, with 0 for |x| < min_value"""
+        abs_x = np.abs(x)
+        small = abs_x < self.min_value
+        log_key = np.ceil(np.log(np.where(small, self.min_value, abs_x)) / self.log_gamma)
+        keys = np.maximum(log_key, self.min_key) - self.min_key + 1
+        return np.where(small, 0, np.sign(x) * keys).astype(np.int64)
+
+    def update(self, x, y):
+        """Add a chunk of aligned x, y values, rows with missing values are dropped"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = np.isfinite(x) & np.isfinite(y)
+        x, y = x[valid], y[valid]
+        chunk = pd.DataFrame({'count': 1.0, 'sum_x': x, 'sum_y': y, 'sum_y2': y * y}, index=self.keys(x))
+        self.bins = self.bins.add(chunk.groupby(level=0).sum(), fill_value=0)
+        return self
+
+    def merge(self, other: 'StreamingXYGroup'):
+        """Combine with a sketch built by another worker"""
+        if (other.relative_accuracy, other.min_value) != (self.relative_accuracy, self.min_value):
+            raise ValueError("Cannot merge sketches with different relative_accuracy or min_value")
+        self.bins = self.bins.add(other.bins, fill_value=0)
+        return self
+
+    def result(self, n: int) -> pd.DataFrame:
+        """
+        Group into n approximate quantile buckets of x.
+
+        outputs:
+            pd.DataFrame indexed by bucket with x_mean, y_mean, count and y_se (standard error of y_mean)
+        """
+        bins = self.bins.sort_index()
+        total = bins['count'].sum()
+        # assign each bin to the bucket containing its middle rank
+        mid_rank = bins['count'].cumsum() - bins['count'] / 2
+        buckets = np.minimum((n * mid_rank / total).astype(int), n - 1)
+        grouped = bins.groupby(buckets.values).sum()
+        count = grouped['count']
+        y_mean = grouped['sum_y'] / count
+        y_var = (grouped['sum_y2'] - count * y_mean ** 2) / (count - 1)
+        return pd.DataFrame({
+            'x_mean': grouped['sum_x'] / count,
+            'y_mean': y_mean,
+            'count': count.astype(int),
+            'y_se': np.sqrt(y_var.clip(lower=0) / count),
+        })
+
+
+def streaming_xy_group(
+        chunks,
+        n: int,
+        relative_accuracy: float = 0.01,
+    ) -> pd.DataFrame:
+    """
+    Group x and y into n quantile buckets of x in one bounded memory pass over (x, y) chunks.
+    """
+    sketch = StreamingXYGroup(relative_accuracy)
+    for x, y in chunks:
+        sketch.update(x, y)
+    return sketch.result(n)
@@ -1 +1,6 @@
-from .client import HyperliquidAsync
\ No newline at end of file
+def __getattr__(name):
+    # imported on first access so submodules can be used without loading the client
+    if name == 'HyperliquidAsync':
+        from .client import HyperliquidAsync
+        return HyperliquidAsync
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,7 +1,4 @@
-import aiohttp
 import logging
-import os
-import contextlib
 from typing import Optional
 
 from aiolimiter import AsyncLimiter
@@ -17,9 +14,17 @@ class API:
     def __init__(self, api_url: Optional[str] = None):
         """Async API client for Hyperliquid"""
         self.api_url = api_url or MAINNET_API_URL
-        self.session = aiohttp.ClientSession(headers={'Content-Type': 'application/json'})
+        self._session = None
         self.limiter = AsyncLimiter(self.MAX_REQUESTS_PER_MINUTE, 60)
 
+    @property
+    def session(self):
+        """HTTP session, created on first request"""
+        if self._session is None:
+            import aiohttp
+            self._session = aiohttp.ClientSession(headers={'Content-Type': 'application/json'})
+        return self._session
+
     async def post(self, endpoint, payload):
         """Make a POST request to the API"""
         async with self.limiter:
@@ -29,4 +34,5 @@ class API:
         
     async def close(self):
         """Close the session"""
-        await self.session.close()
\ No newline at end of file
+        if self._session is not None:
+            await self._session.close()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EXTRA_PREFIX = 'extra_'
+
+
+def save_checkpoint(path: str, coin_state: dict[str, dict[str, float]], **extra):
+    """
+    Atomically write per coin state and extra arrays to an uncompressed .npz checkpoint.
+
+    inputs:
+        coin_state: name -> {coin: value}, stored as aligned float arrays over the union of coins
+        extra: name -> scalar or array, e.g. timestamps and model coefficients
+    """
+    coins = sorted(set().union(*coin_state.values()))
+    arrays = {name: np.array([values.get(coin, np.nan) for coin in coins], dtype=np.float64) for name, values in coin_state.items()}
+    arrays.update({f'{EXTRA_PREFIX}{name}': np.asarray(value) for name, value in extra.items()})
+    # write alongside then rename, so a crash mid-write never leaves a truncated checkpoint
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, coins=np.array(coins, dtype=str), **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.debug(f"Saved checkpoint of {len(coins)} coins to {path}")
+
+
+def load_checkpoint(path: str) -> tuple[dict[str, dict[str, float]], dict]:
+    """
+    Load checkpoint written by save_checkpoint.
+
+    outputs:
+        coin_state: name -> {coin: value}, missing values dropped
+        extra: name -> array
+    """
+    with np.load(path, allow_pickle=False) as data:
+        coins = data['coins'].tolist()
+        coin_state = {}
+        extra = {}
+        for name in data.files:
+            if name == 'coins':
+                continue
+            if name.startswith(EXTRA_PREFIX):
+                extra[name[len(EXTRA_PREFIX):]] = data[name]
+            else:
+                coin_state[name] = {coin: value for coin, value in zip(coins, data[name].tolist()) if not np.isnan(value)}
+    return coin_state, extra
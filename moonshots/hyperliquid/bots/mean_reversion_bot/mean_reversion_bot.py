@@ -1,17 +1,20 @@
 import asyncio
 import uvloop
 import logging
+import os
+import sys
 import time
 import traceback
+from typing import Optional
 
 import numpy as np
-import pandas as pd
-import cvxpy as cp
-import statsmodels.api as sm
 
 from moonshots.hyperliquid import HyperliquidAsync
 from moonshots.hyperliquid.websocket_manager import WebsocketManager
-from moonshots.hyperliquid.scraper import Scraper
+from moonshots.hyperliquid.decode import FrameDecoder
+from moonshots.hyperliquid.hub import MarketDataHub
+from moonshots.hyperliquid.paper import PaperHyperliquidAsync
+from moonshots.hyperliquid.bots.checkpoint import save_checkpoint, load_checkpoint
 from moonshots.utils.time import ms_timestamp
 from moonshots.utils.json import dumps, loads
 
@@ -19,15 +22,35 @@ logger = logging.getLogger(__name__)
 
 class MeanReversionBot:
 
-    def __init__(self, config_path: str):
-        """Mean reversion bot"""
+    def __init__(self, config_path: str, hub: Optional[MarketDataHub] = None, paper: bool = False, shm_name: Optional[str] = None):
+        """
+        Mean reversion bot, optionally sharing a market data hub with other strategies.
+        With paper=True orders and positions go through an in-process paper exchange.
+        With shm_name mids are read from a shared memory IngestionProcess instead of an allMids subscription.
+        """
         self.config_path = config_path
         self.config = {}
-        self.client = HyperliquidAsync()
-        self.ws = WebsocketManager()
-        self.rolling_means = {}
-        self.rolling_std = {}
-        self.signals = {}
+        self.hub = hub
+        self.paper = paper
+        self.shm_name = shm_name
+        if paper:
+            self.client = PaperHyperliquidAsync()
+        else:
+            self.client = hub.client if hub else HyperliquidAsync()
+        # market data requests go through the hub's session and rate limiter, even when trading on paper
+        self.data_client = hub.client if hub else self.client
+        # mids are decoded in bulk into decoder.mids, shared with the hub's decoder when there is one
+        self.decoder = hub.decoder if hub else FrameDecoder()
+        self.ws = hub or WebsocketManager(decoder=self.decoder)
+        # per coin state is kept in arrays indexed by the decoder's CoinIndex, NaN where a coin has no value yet
+        self.coins = self.decoder.coins
+        self.rolling_means = np.full(self.decoder.capacity, np.nan)
+        self.rolling_std = np.full(self.decoder.capacity, np.nan)
+        self.z_scores = np.full(self.decoder.capacity, np.nan)
+        self.signals = np.full(self.decoder.capacity, np.nan)
+        self.last_prices = np.full(self.decoder.capacity, np.nan)
+        self._shm_idx = np.empty(0, dtype=np.int64)  # shared memory coin index -> self.coins index
+        self.last_time = time.time()
         self.positions = {}
         self.live_positions = False
 
@@ -41,16 +64,57 @@ class MeanReversionBot:
             logger.info(f"Updated config: {self.config}")
             await asyncio.sleep(self.config['config_refresh_interval']) 
 
+    def coin_index(self, coins: list[str]) -> np.ndarray:
+        """Indices of coins in the state arrays, adding new coins and growing the arrays if needed"""
+        idx = np.array([self.coins.get(coin) for coin in coins], dtype=np.int64)
+        self.decoder.ensure_capacity()
+        self.ensure_capacity()
+        return idx
+
+    def ensure_capacity(self):
+        """Grow state arrays to the decoder's capacity once coins have been added past it"""
+        capacity = self.decoder.capacity
+        if len(self.last_prices) >= capacity:
+            return
+        for name in ('rolling_means', 'rolling_std', 'z_scores', 'signals', 'last_prices'):
+            grown = np.full(capacity, np.nan)
+            grown[:len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def active_coins(self) -> np.ndarray:
+        """Indices of coins that have a price"""
+        return np.flatnonzero(~np.isnan(self.last_prices[:len(self.coins)]))
+
+    def to_dict(self, values: np.ndarray) -> dict[str, float]:
+        """{coin: value} for coins with a value"""
+        n = len(self.coins)
+        idx = np.flatnonzero(~np.isnan(values[:n]))
+        return dict(zip([self.coins.coins[i] for i in idx], values[idx].tolist()))
+
+    def from_dict(self, values: dict[str, float]) -> np.ndarray:
+        """State array from {coin: value}"""
+        idx = self.coin_index(list(values))
+        array = np.full(len(self.last_prices), np.nan)
+        array[idx] = list(values.values())
+        return array
+
+    def update_signals(self):
+        """Cross sectionally demeaned z-scores"""
+        z_scores = self.z_scores[:len(self.coins)]
+        self.signals = self.z_scores - (np.nanmean(z_scores) if np.isfinite(z_scores).any() else 0.0)
+
     async def init_candle_cache(self):
         """Populate historical candle cache and fit initial model"""
+        # only needed on cold starts, warm starts from a checkpoint never import statsmodels
+        import statsmodels.api as sm
         logger.info("Initializing candle cache...")
-        # find how many periods we need to look back
-        end = ms_timestamp()
+        # find how many periods we need to look back, from the last whole minute so
+        # strategies warming up together on one hub issue identical, shared requests
+        end = ms_timestamp() // 60_000 * 60_000
         start = end - self.config['ema_n_minutes'] * 1000 * 60
         # get historical candles
-        scraper = Scraper()
-        candles = await scraper.historical_candles(interval='1m', start=start, end=end)
-        close_prices = candles['c'].unstack()
+        candles = await self.data_client.historical_candles(interval='1m', start=start, end=end, columnar=True)
+        close_prices = candles.close_matrix()
         # get signals and fit initial model
         rolling_means = close_prices.ewm(span=self.config['ema_n_minutes']).mean()
         rolling_stds = close_prices.ewm(span=self.config['ema_n_minutes']).std()
@@ -64,40 +128,123 @@ class MeanReversionBot:
         self.model = sm.OLS(y.loc[idx], sm.add_constant(x.loc[idx])).fit()
         logger.info(f"Model fit:\n{self.model.summary()}")
         # store most recent data
-        self.rolling_means = dict(rolling_means.iloc[-1])
-        self.rolling_stds = dict(rolling_stds.iloc[-1])
-        self.z_scores = dict(z_scores.iloc[-1])
-        self.signals = dict(signals.iloc[-1])
-        self.last_prices = dict(close_prices.iloc[-1])
+        self.model_params = self.model.params.values
+        idx = self.coin_index(list(close_prices.columns))
+        self.rolling_means[idx] = rolling_means.iloc[-1].values
+        self.rolling_std[idx] = rolling_stds.iloc[-1].values
+        self.z_scores[idx] = z_scores.iloc[-1].values
+        self.last_prices[idx] = close_prices.iloc[-1].values
+        self.update_signals()
         self.last_time = close_prices.index[-1].timestamp()
 
     def on_mids_update(self, msg):
-        """Update internal state with new mid prices"""
-        # update last time
-        self.last_time = time.time()
-        # update price data
-        for coin in msg['data']['mids']:
-            price = float(msg['data']['mids'][coin])
-            self.last_prices[coin] = float(price)
-            time_diff_minutes = (time.time() - self.last_time) / 60
-            adjusted_alpha = 1 - (1 - self.config['alpha']) ** time_diff_minutes
-            if coin not in self.rolling_means:
-                self.rolling_means[coin] = price
-            else:
-                self.rolling_means[coin] = adjusted_alpha * price + (1 - adjusted_alpha) * self.rolling_means[coin]
-            if coin not in self.rolling_std:
-                self.rolling_std[coin] = 0.0
-            else:
-                time_diff_minutes = (time.time() - self.last_time) / 60
-                adjusted_alpha = 1 - (1 - self.config['alpha']) ** time_diff_minutes
-                deviation = price - self.rolling_means[coin]
-                square_deviation = deviation ** 2
-                self.rolling_std[coin] = np.sqrt(
-                    adjusted_alpha * square_deviation + (1 - adjusted_alpha) * self.rolling_std[coin] ** 2
-                )
-                self.z_scores[coin] = (price - self.rolling_means[coin]) / self.rolling_std[coin] if self.rolling_std[coin] > 0 else 0.0
-        mean_z_score = np.mean(self.z_scores.values())
-        self.signals = {k: v - mean_z_score for k, v in self.z_scores.items()}
+        """Update internal state with new mid prices, already parsed by the decoder"""
+        idx = msg['idx']
+        self.ensure_capacity()
+        self.update_prices(idx, self.decoder.mids[idx], time.time())
+
+    async def poll_shm_mids(self, interval: float = 1.0):
+        """Feed mids published by an IngestionProcess into the EWMA state every interval seconds"""
+        from moonshots.hyperliquid.shm import ShmReader
+        reader = ShmReader(self.shm_name)
+        mids = None
+        try:
+            while True:
+                if not reader.writer_alive():
+                    logger.warning(f"Shared memory writer silent for {reader.heartbeat_age}ms, mids are stale")
+                else:
+                    try:
+                        mids = reader.read_mids(mids)
+                    except TimeoutError:
+                        logger.error(traceback.format_exc())
+                    else:
+                        # map the writer's coin indices onto ours, only when it has added coins
+                        if len(mids) > len(self._shm_idx):
+                            self._shm_idx = self.coin_index(reader.coins[:len(mids)])
+                        valid = ~np.isnan(mids)
+                        self.update_prices(self._shm_idx[:len(mids)][valid], mids[valid], time.time())
+                await asyncio.sleep(interval)
+        finally:
+            reader.close()
+
+    def update_prices(self, idx: np.ndarray, prices: np.ndarray, timestamp: float):
+        """Update EWMA state of coins idx with prices observed at timestamp (seconds), in one vectorised step"""
+        time_diff_minutes = (timestamp - self.last_time) / 60
+        adjusted_alpha = 1 - (1 - self.config['alpha']) ** time_diff_minutes
+        self.last_time = timestamp
+        self.last_prices[idx] = prices
+        # coins seen for the first time start their mean at the price and their std at 0
+        means = self.rolling_means[idx]
+        means = np.where(np.isnan(means), prices, adjusted_alpha * prices + (1 - adjusted_alpha) * means)
+        self.rolling_means[idx] = means
+        stds = self.rolling_std[idx]
+        has_std = ~np.isnan(stds)
+        stds = np.where(has_std, np.sqrt(adjusted_alpha * (prices - means) ** 2 + (1 - adjusted_alpha) * stds ** 2), 0.0)
+        self.rolling_std[idx] = stds
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(stds > 0, (prices - means) / stds, 0.0)
+        self.z_scores[idx] = np.where(has_std, z_scores, self.z_scores[idx])
+        self.update_signals()
+
+    def save_checkpoint(self):
+        """Write bot state to checkpoint file"""
+        save_checkpoint(
+            self.config['checkpoint_path'],
+            {
+                'rolling_means': self.to_dict(self.rolling_means),
+                'rolling_std': self.to_dict(self.rolling_std),
+                'z_scores': self.to_dict(self.z_scores),
+                'last_prices': self.to_dict(self.last_prices),
+                'positions': self.positions,
+            },
+            last_time=self.last_time,
+            model_params=self.model_params,
+        )
+
+    def load_checkpoint(self) -> bool:
+        """Restore bot state from checkpoint if present and recent enough to be worth warm starting"""
+        path = self.config.get('checkpoint_path')
+        if not path or not os.path.exists(path):
+            return False
+        coin_state, extra = load_checkpoint(path)
+        age_minutes = (time.time() - float(extra['last_time'])) / 60
+        if age_minutes > self.config['ema_n_minutes']:
+            logger.info(f"Checkpoint is {age_minutes:.0f} minutes old, reinitializing from scratch")
+            return False
+        self.rolling_means = self.from_dict(coin_state['rolling_means'])
+        self.rolling_std = self.from_dict(coin_state['rolling_std'])
+        self.z_scores = self.from_dict(coin_state['z_scores'])
+        self.last_prices = self.from_dict(coin_state['last_prices'])
+        self.positions = coin_state['positions']
+        self.last_time = float(extra['last_time'])
+        self.model_params = extra['model_params']
+        self.update_signals()
+        logger.info(f"Loaded checkpoint from {age_minutes:.1f} minutes ago")
+        return True
+
+    async def backfill(self):
+        """Replay 1m candles since the last update through the EWMA state"""
+        start = int(self.last_time * 1000)
+        end = ms_timestamp()
+        candles = await self.data_client.historical_candles(coins=list(self.to_dict(self.last_prices)), interval='1m', start=start, end=end, columnar=True)
+        if len(candles) == 0:
+            return
+        close_prices = candles.close_matrix()
+        close_prices = close_prices[close_prices.index.map(lambda t: t.timestamp()) > self.last_time]
+        idx = self.coin_index(list(close_prices.columns))
+        for t, row in zip(close_prices.index, close_prices.values):
+            valid = ~np.isnan(row)
+            self.update_prices(idx[valid], row[valid], t.timestamp())
+        logger.info(f"Backfilled {len(close_prices)} minutes since checkpoint")
+
+    async def checkpoint_periodically(self):
+        """Checkpoint bot state every checkpoint_interval seconds"""
+        while True:
+            await asyncio.sleep(self.config['checkpoint_interval'])
+            try:
+                self.save_checkpoint()
+            except Exception:
+                logger.error(f"Checkpoint failed:\n{traceback.format_exc()}")
 
     def on_positions_update(self, msg):
         logger.info(f"Received webData2 update.")
@@ -120,6 +267,8 @@ class MeanReversionBot:
 
     async def run(self):
         """Main loop"""
+        import cvxpy as cp
+        import pandas as pd
 
         # read config every 10 seconds
         asyncio.create_task(self.read_config())
@@ -127,9 +276,14 @@ class MeanReversionBot:
             logger.info("Config not yet read, waiting...")
             await asyncio.sleep(1)
 
-        # get cache
-        await self.init_candle_cache()
-        if not self.last_prices:
+        # warm start from checkpoint, else get cache
+        if self.load_checkpoint():
+            await self.backfill()
+        else:
+            await self.init_candle_cache()
+        if self.config.get('checkpoint_path'):
+            asyncio.create_task(self.checkpoint_periodically())
+        if not len(self.active_coins()):
             logger.info("Candle cache not yet initialized, waiting...")
             await asyncio.sleep(1)
 
@@ -140,10 +294,16 @@ class MeanReversionBot:
         await self.ws.connect()
 
         # # subscribe to mids
-        await self.ws.subscribe({'type': 'allMids'}, callback=self.on_mids_update)
+        if self.shm_name:
+            asyncio.create_task(self.poll_shm_mids())
+        else:
+            await self.ws.subscribe({'type': 'allMids'}, callback=self.on_mids_update)
 
         # subscribe to positions
-        await self.ws.subscribe({'type': 'webData2', 'user': self.client.address}, callback=self.on_positions_update)
+        if self.paper:
+            await self.client.start(self.ws, list(self.to_dict(self.last_prices)), self.on_positions_update)
+        else:
+            await self.ws.subscribe({'type': 'webData2', 'user': self.client.address}, callback=self.on_positions_update)
         if not self.live_positions:
             logger.info("Positions not yet received, waiting...")
             await asyncio.sleep(1)
@@ -153,12 +313,12 @@ class MeanReversionBot:
             try:
                 
                 # get expected return of coins and current holdings
-                coins = list(self.last_prices.keys())  # List of coins to ensure consistent order
-                expected_returns = self.model.predict(sm.add_constant(
-                    [0.0 if np.isnan(self.signals[coin]) else self.signals[coin] for coin in coins]
-                ))                
-                current_holdings = np.array([self.positions.get(coin, 0.0) for coin in self.last_prices.keys()])
-                num_assets = len(self.last_prices)
+                idx = self.active_coins()
+                coins = [self.coins.coins[i] for i in idx]  # List of coins to ensure consistent order
+                signals = self.signals[idx]
+                expected_returns = self.model_params[0] + self.model_params[1] * np.nan_to_num(signals)
+                current_holdings = np.array([self.positions.get(coin, 0.0) for coin in coins])
+                num_assets = len(coins)
 
                 # define optimisation problem
                 weights = cp.Variable(num_assets)
@@ -176,7 +336,7 @@ class MeanReversionBot:
                 if problem.status not in ["optimal", "optimal_inaccurate"]:
                     logger.error(f"Optimization failed with status: {problem.status}, defaulting to long-short weights")
                     # just take optimal weights from n largest and n smallest signals
-                    signal_series = pd.Series(self.signals).fillna(0.0)
+                    signal_series = pd.Series(signals, index=coins).fillna(0.0)
                     long_short = (
                         (signal_series>signal_series.quantile(0.9).astype(int)) 
                         - (signal_series<signal_series.quantile(0.1).astype(int))
@@ -209,7 +369,7 @@ class MeanReversionBot:
 
 
 async def main():
-    bot = MeanReversionBot(config_path='./config.json')
+    bot = MeanReversionBot(config_path='./config.json', paper='--paper' in sys.argv)
     await bot.run()
 
 if __name__ == '__main__':
@@ -3,11 +3,14 @@
 import asyncio
 from collections import deque
 import logging
+from typing import Optional
 
 import numpy as np
 
 from moonshots.hyperliquid import HyperliquidAsync
 from moonshots.hyperliquid.websocket_manager import WebsocketManager
+from moonshots.hyperliquid.hub import MarketDataHub
+from moonshots.hyperliquid.paper import PaperHyperliquidAsync
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +23,16 @@ class PositionAlgo():
                  cache_length: int = 1000,
                  ema_alpha: float = 0.02,
                  bollinger_b: float = 5.0,
-                 order_size_usd: float = 20.0
+                 order_size_usd: float = 20.0,
+                 hub: Optional[MarketDataHub] = None,
+                 paper: bool = False
                  ):
-        self.client = HyperliquidAsync()
-        self.ws = WebsocketManager()
+        self.paper = paper
+        if paper:
+            self.client = PaperHyperliquidAsync()
+        else:
+            self.client = hub.client if hub else HyperliquidAsync()
+        self.ws = hub or WebsocketManager()
         self.coin = coin
         self.freq = freq
         self.close_cache = deque(maxlen=cache_length)
@@ -84,7 +93,10 @@ class PositionAlgo():
         await self.ws.subscribe({'type': 'candle', 'coin': self.coin, 'interval': self.freq}, self.on_candle_update)
 
         # subscribe to holdings
-        await self.ws.subscribe({"type": "webData2", "user": self.client.address}, callback=self.on_webdata_update)
+        if self.paper:
+            await self.client.start(self.ws, [self.coin], self.on_webdata_update)
+        else:
+            await self.ws.subscribe({"type": "webData2", "user": self.client.address}, callback=self.on_webdata_update)
         
         # main loop
         while True:
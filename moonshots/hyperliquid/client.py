@@ -1,12 +1,9 @@
+import asyncio
 import logging
+from functools import cache, cached_property
 from typing import Optional
-from dotenv import load_dotenv, find_dotenv
 import os
 import time
-from decimal import Decimal
-load_dotenv(find_dotenv())
-
-import eth_account
 
 from moonshots.hyperliquid.constants import MAINNET_API_URL
 from moonshots.hyperliquid.api import API
@@ -15,16 +12,37 @@ from moonshots.utils.time import ms_timestamp
 
 logger = logging.getLogger(__name__)
 
+@cache
+def load_env():
+    """Load .env once, on first use of credentials"""
+    from dotenv import load_dotenv, find_dotenv
+    load_dotenv(find_dotenv())
+
 class HyperliquidAsync(API):
     """
     Asynchronous hyperliquid client
     """
     def __init__(self, address = None, api_url = None, ws_url = None):
         super().__init__(api_url or MAINNET_API_URL)  
-        self.address = address or os.getenv("USER_ADDRESS")
+        self._address = address
         self.api_url = api_url or MAINNET_API_URL
-        self.wallet = eth_account.Account.from_key(parse_secret_key(os.getenv('WALLET_SECRET')))
         self.vault_address = None # TODO: need to update if using vault
+        self._candle_requests = {}  # (coin, interval, start, end) -> in flight request
+
+    @property
+    def address(self):
+        """User address, from USER_ADDRESS if not given"""
+        if self._address is None:
+            load_env()
+            self._address = os.getenv("USER_ADDRESS")
+        return self._address
+
+    @cached_property
+    def wallet(self):
+        """Signing wallet, only derived from WALLET_SECRET once an action needs signing"""
+        load_env()
+        import eth_account
+        return eth_account.Account.from_key(parse_secret_key(os.getenv('WALLET_SECRET')))
         
     async def user_state(self, spot: bool = False):
         """Retrieve user state"""
@@ -52,7 +70,43 @@ class HyperliquidAsync(API):
             end = int(time.time()*1000)
         if start is None:
             start = 1 # ensure max history
-        return await self.post("/info", {"type": "candleSnapshot", "req": {"coin": coin, "interval": interval, "startTime": start, "endTime": end}})
+        # strategies sharing this client often warm up on the same window, so share identical in flight requests
+        key = (coin, interval, start, end)
+        request = self._candle_requests.get(key)
+        if request is None:
+            request = self._candle_requests[key] = asyncio.ensure_future(
+                self.post("/info", {"type": "candleSnapshot", "req": {"coin": coin, "interval": interval, "startTime": start, "endTime": end}})
+            )
+            request.add_done_callback(lambda _: self._candle_requests.pop(key, None))
+        # one caller being cancelled must not cancel the request for the others
+        return await asyncio.shield(request)
+
+    async def historical_candles(
+            self, 
+            coins: Optional[list[str]] = None, 
+            spot: bool = False, 
+            interval: str = "1h", 
+            parse_pandas: bool = True,
+            columnar: bool = False,
+            start: Optional[int] = None,
+            end: Optional[int] = None
+            ):
+        """
+        Retrieve historical candles for a list of coins, or whole universe if coins not given.
+        Requests go through this client's session and rate limiter, so strategies sharing a client share the budget.
+        Returns a DataFrame if parse_pandas, CandleColumns if columnar, else the flat list of candle dicts.
+        """
+        from tqdm.asyncio import tqdm_asyncio
+        from moonshots.hyperliquid.pandas_utils import parse_candle_snapshots
+        if coins is None:
+            meta = await self.meta(spot)
+            coins = [item['name'] for item in meta['universe']]
+        logger.debug(f"Retrieving historical candles for {len(coins)} coins with {self.MAX_REQUESTS_PER_MINUTE} requests per minute.")
+        candle_snapshots = await tqdm_asyncio.gather(*[self.candle_snapshot(coin, interval, start, end) for coin in coins])
+        if columnar or parse_pandas:
+            columns = parse_candle_snapshots(candle_snapshots)
+            return columns if columnar else columns.to_pandas()
+        return [item for sublist in candle_snapshots for item in sublist]
 
     async def l2_snapshot(self, coin: str):
         """Retrieve L2 snapshot for a given coin"""
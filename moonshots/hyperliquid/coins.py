@@ -0,0 +1,27 @@
+class CoinIndex:
+    """
+    Stable coin name -> array index mapping.
+    Indices are assigned in insertion order and never reused, so arrays keyed by them stay valid as coins are added.
+    """
+    def __init__(self, coins: list[str] = ()):
+        self.coins = []
+        self.index = {}
+        for coin in coins:
+            self.get(coin)
+
+    def get(self, coin: str) -> int:
+        """Get index for coin, assigning the next free index if unseen"""
+        idx = self.index.get(coin)
+        if idx is None:
+            idx = self.index[coin] = len(self.coins)
+            self.coins.append(coin)
+        return idx
+
+    def __getitem__(self, coin: str) -> int:
+        return self.index[coin]
+
+    def __contains__(self, coin: str) -> bool:
+        return coin in self.index
+
+    def __len__(self) -> int:
+        return len(self.coins)
@@ -0,0 +1,138 @@
+import asyncio
+import importlib
+import logging
+import sys
+import traceback
+from functools import partial
+from typing import Optional
+
+import numpy as np
+import uvloop
+
+from moonshots.hyperliquid.client import HyperliquidAsync
+from moonshots.hyperliquid.coins import CoinIndex
+from moonshots.hyperliquid.decode import FrameDecoder
+from moonshots.hyperliquid.websocket_manager import WebsocketManager
+from moonshots.utils.json import loads
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataHub:
+    """
+    Shares one websocket connection and one API session between many in-process strategies.
+
+    Subscriptions are reference counted per channel identifier, messages are fanned out to
+    every consumer, and parsed state (mids array, books, positions) is kept once for all of them.
+    Exposes the same connect/subscribe/close interface as WebsocketManager so it can be used in its place.
+
+    Every consumer receives the same message dict, so callbacks must treat messages as read-only.
+    User channels (webData2, userEvents) are routed by channel alone, so all consumers must
+    subscribe for the same user.
+    """
+    def __init__(self, ws_url: Optional[str] = None, api_url: Optional[str] = None, address: Optional[str] = None, capacity: int = 512):
+        self.coins = CoinIndex()
+        self.decoder = FrameDecoder(self.coins, capacity)
+        self.ws = WebsocketManager(ws_url, decoder=self.decoder)
+        self.client = HyperliquidAsync(address=address, api_url=api_url)
+        self.positions = {}    # latest clearinghouseState
+        self.consumers = {}    # id -> list of callbacks
+        self.subscriptions = {}  # id -> subscription
+        self.users = 0
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def mids(self) -> np.ndarray:
+        """Latest mid per coin, indexed by self.coins. This is a view, not a copy."""
+        return self.decoder.mids[:len(self.coins)]
+
+    @property
+    def books(self) -> np.ndarray:
+        """Latest books [coin, side, level, (px, sz)], indexed by self.coins. This is a view, not a copy."""
+        return self.decoder.books[:len(self.coins)]
+
+    def mid(self, coin: str) -> float:
+        """Latest mid for a coin"""
+        return self.decoder.mids[self.coins[coin]]
+
+    async def connect(self):
+        """Connect on first use, later calls share the existing connection"""
+        async with self._connect_lock:
+            if self.users == 0:
+                # perp asset ids line up with universe order, so index perps first
+                for item in (await self.client.meta())['universe']:
+                    self.coins.get(item['name'])
+                self.decoder.ensure_capacity()
+                await self.ws.connect()
+            self.users += 1
+        return self
+
+    async def close(self):
+        """Release connection, closed once the last user is done"""
+        async with self._connect_lock:
+            self.users -= 1
+            if self.users == 0:
+                await self.ws.close()
+                await self.client.close()
+
+    async def subscribe(self, subscription: dict, callback = None):
+        """Subscribe consumer callback, only the first subscriber to a channel hits the websocket"""
+        id = WebsocketManager.subscription_to_identifier(subscription)
+        consumers = self.consumers.get(id)
+        if consumers is not None and subscription.get('user') != self.subscriptions[id].get('user'):
+            raise ValueError(f"{id} is already subscribed for user {self.subscriptions[id].get('user')}, cannot share it with {subscription.get('user')}")
+        if consumers is None:
+            consumers = self.consumers[id] = []
+            self.subscriptions[id] = subscription
+            consumers.append(callback)
+            await self.ws.subscribe(subscription, partial(self.dispatch, id))
+        else:
+            consumers.append(callback)
+        logger.debug(f"{len(consumers)} consumers subscribed to {id}")
+        return id
+
+    async def unsubscribe(self, subscription: dict, callback = None):
+        """Remove consumer callback, unsubscribing the websocket when none remain"""
+        id = WebsocketManager.subscription_to_identifier(subscription)
+        consumers = self.consumers.get(id, [])
+        if callback in consumers:
+            consumers.remove(callback)
+        if not consumers and id in self.consumers:
+            del self.consumers[id]
+            del self.subscriptions[id]
+            await self.ws.unsubscribe(subscription)
+
+    def dispatch(self, id: str, msg: dict):
+        """Update shared state then fan message out to consumers"""
+        # mids and books were already written into shared arrays by the decoder
+        if msg['channel'] == 'webData2':
+            self.positions = msg['data']['clearinghouseState']
+        for callback in list(self.consumers.get(id, ())):
+            if callback is None:
+                continue
+            try:
+                callback(msg)
+            except Exception:
+                logger.error(f"Consumer {callback} failed on {id}:\n{traceback.format_exc()}")
+
+
+def load_strategy(spec: dict, hub: MarketDataHub):
+    """Instantiate strategy from config spec {"class": "module.Class", "kwargs": {...}}"""
+    module_name, class_name = spec['class'].rsplit('.', 1)
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls(**spec.get('kwargs', {}), hub=hub)
+
+
+async def run_strategies(config_path: str):
+    """Run all strategies in a config file off a single hub"""
+    with open(config_path) as f:
+        config = loads(f.read())
+    hub = MarketDataHub(**config.get('hub', {}))
+    strategies = [load_strategy(spec, hub) for spec in config['strategies']]
+    logger.info(f"Running {len(strategies)} strategies off one hub")
+    await asyncio.gather(*(strategy.run() for strategy in strategies))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    uvloop.run(run_strategies(sys.argv[1] if len(sys.argv) > 1 else './strategies.json'))
@@ -1,5 +1,105 @@
+import numpy as np
 import pandas as pd
 
+from moonshots.hyperliquid.coins import CoinIndex
+
+CANDLE_FLOAT_FIELDS = ('o', 'c', 'h', 'l', 'v')
+
+
+class CandleColumns:
+    """
+    Candle snapshots parsed into flat typed columns.
+
+    attributes:
+        t: int64 candle start timestamps (ms)
+        coin: int32 index into coins
+        o, c, h, l, v: float64
+        n: int64 number of trades
+        coins: list of coin names
+        interval: candle interval
+    """
+    def __init__(self, t: np.ndarray, coin: np.ndarray, columns: dict[str, np.ndarray], coins: list[str], interval: str):
+        self.t = t
+        self.coin = coin
+        self.columns = columns
+        self.coins = coins
+        self.interval = interval
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def to_pandas(self) -> pd.DataFrame:
+        """DataFrame indexed by (t, s), same layout as parse_candles_to_pandas"""
+        names = np.array(self.coins, dtype=object)[self.coin]
+        order = np.lexsort((names, self.t))
+        index = pd.MultiIndex.from_arrays(
+            [pd.to_datetime(self.t[order], unit='ms'), names[order]],
+            names=['t', 's'],
+        )
+        data = {'i': np.full(len(self), self.interval, dtype=object)}
+        data.update({field: values[order] for field, values in self.columns.items()})
+        return pd.DataFrame(data, index=index)
+
+    def to_arrow(self):
+        """pyarrow Table with coin as a dictionary encoded column"""
+        import pyarrow as pa
+        arrays = {
+            't': pa.array(self.t.astype('datetime64[ms]')),
+            's': pa.DictionaryArray.from_arrays(pa.array(self.coin), pa.array(self.coins, type=pa.string())),
+        }
+        arrays.update({field: pa.array(values) for field, values in self.columns.items()})
+        return pa.table(arrays)
+
+    def close_matrix(self, field: str = 'c') -> pd.DataFrame:
+        """Dense time x coin matrix of one field, equivalent to df[field].unstack()"""
+        times, t_idx = np.unique(self.t, return_inverse=True)
+        matrix = np.full((len(times), len(self.coins)), np.nan)
+        matrix[t_idx, self.coin] = self.columns[field]
+        return pd.DataFrame(
+            matrix,
+            index=pd.DatetimeIndex(pd.to_datetime(times, unit='ms'), name='t'),
+            columns=pd.Index(self.coins, name='s'),
+        ).sort_index(axis=1)
+
+
+def parse_candle_snapshots(snapshots: list[list[dict]]) -> CandleColumns:
+    """
+    Parse Hyperliquid API candle snapshots into typed columns in a single pass,
+    writing each field straight into preallocated arrays instead of building a frame of dicts.
+
+    inputs:
+        snapshots: list of candle snapshots, each a list of candle dicts as in parse_candles_to_pandas
+
+    outputs:
+        CandleColumns
+    """
+    total = sum(len(snapshot) for snapshot in snapshots)
+    coins = CoinIndex()
+    t = np.empty(total, dtype=np.int64)
+    coin = np.empty(total, dtype=np.int32)
+    n = np.empty(total, dtype=np.int64)
+    columns = {field: np.empty(total, dtype=np.float64) for field in CANDLE_FLOAT_FIELDS}
+    interval = None
+    start = 0
+    for snapshot in snapshots:
+        if not snapshot:
+            continue
+        end = start + len(snapshot)
+        interval = interval or snapshot[0]['i']
+        t[start:end] = [candle['t'] for candle in snapshot]
+        coin[start:end] = [coins.get(candle['s']) for candle in snapshot]
+        n[start:end] = [candle['n'] for candle in snapshot]
+        # string encoded numbers are converted by numpy on assignment
+        for field, values in columns.items():
+            values[start:end] = [candle[field] for candle in snapshot]
+        start = end
+    columns['n'] = n
+    return CandleColumns(t, coin, columns, coins.coins, interval)
+
+
 def parse_candles_to_pandas(candles: list[dict]):
     """
     Parse Hyperliquid API candle snapshot into pandas DataFrame
@@ -23,9 +123,4 @@ def parse_candles_to_pandas(candles: list[dict]):
         df: pd.DataFrame
 
     """
-    df = pd.DataFrame(candles).drop('T', axis=1)
-    df['t'] = pd.to_datetime(df['t'], unit='ms')
-    df.set_index(['t','s'], inplace=True)
-    df[['o', 'c', 'h', 'l', 'v']] = df[['o', 'c', 'h', 'l', 'v']].astype(float)
-    df['n'] = df['n'].astype(int)
-    return df.sort_index()
\ No newline at end of file
+    return parse_candle_snapshots([candles]).to_pandas()
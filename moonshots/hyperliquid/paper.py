@@ -0,0 +1,453 @@
+import bisect
+import logging
+from collections import deque
+from typing import Optional
+
+from moonshots.hyperliquid.client import HyperliquidAsync
+from moonshots.utils.time import ms_timestamp
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-12
+
+# hyperliquid base tier fees
+MAKER_FEE = 0.0001
+TAKER_FEE = 0.00035
+
+
+class PaperOrder:
+    """Resting paper order with simulated queue position"""
+    __slots__ = ('oid', 'coin', 'is_buy', 'px', 'sz', 'orig_sz', 'queue_ahead', 'reduce_only', 'cloid', 'timestamp')
+
+    def __init__(self, oid: int, coin: str, is_buy: bool, px: float, sz: float, queue_ahead: float, reduce_only: bool, cloid, timestamp: int):
+        self.oid = oid
+        self.coin = coin
+        self.is_buy = is_buy
+        self.px = px
+        self.sz = sz
+        self.orig_sz = sz
+        self.queue_ahead = queue_ahead
+        self.reduce_only = reduce_only
+        self.cloid = cloid
+        self.timestamp = timestamp
+
+    def to_wire(self) -> dict:
+        """Format as returned by the openOrders info endpoint"""
+        return {
+            'coin': self.coin,
+            'side': 'B' if self.is_buy else 'A',
+            'limitPx': str(self.px),
+            'sz': str(self.sz),
+            'oid': self.oid,
+            'timestamp': self.timestamp,
+            'origSz': str(self.orig_sz),
+        }
+
+
+class PaperBook:
+    """
+    Per coin book of paper orders resting against the latest l2 snapshot.
+
+    Our orders are kept in price sorted lists of levels with a FIFO queue per level,
+    so trades and book updates only touch the levels they cross.
+    """
+    def __init__(self, coin: str):
+        self.coin = coin
+        self.bid_pxs = []  # ascending
+        self.ask_pxs = []  # ascending
+        self.bids = {}     # px -> deque[PaperOrder]
+        self.asks = {}     # px -> deque[PaperOrder]
+        self.bid_levels = []  # [(px, sz)] best first, from l2Book
+        self.ask_levels = []
+        self.bid_sz = {}      # px -> visible size
+        self.ask_sz = {}
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bid_levels[0][0] if self.bid_levels else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.ask_levels[0][0] if self.ask_levels else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.bid_levels and self.ask_levels:
+            return (self.bid_levels[0][0] + self.ask_levels[0][0]) / 2
+        return None
+
+    def visible_size(self, is_buy: bool, px: float) -> float:
+        """Visible size at a price level on the given side"""
+        return (self.bid_sz if is_buy else self.ask_sz).get(px, 0.0)
+
+    def add(self, order: PaperOrder):
+        """Add order at the back of its price level"""
+        pxs, levels = (self.bid_pxs, self.bids) if order.is_buy else (self.ask_pxs, self.asks)
+        queue = levels.get(order.px)
+        if queue is None:
+            queue = levels[order.px] = deque()
+            bisect.insort(pxs, order.px)
+        queue.append(order)
+
+    def remove(self, order: PaperOrder):
+        """Remove order from its price level"""
+        pxs, levels = (self.bid_pxs, self.bids) if order.is_buy else (self.ask_pxs, self.asks)
+        queue = levels[order.px]
+        queue.remove(order)
+        if not queue:
+            del levels[order.px]
+            del pxs[bisect.bisect_left(pxs, order.px)]
+
+    def on_levels(self, bids: list, asks: list) -> list[tuple[PaperOrder, float, float]]:
+        """
+        Replace visible book and update queue positions.
+        Returns fills (order, px, sz) for orders the book has moved through.
+        """
+        self.bid_levels = [(float(l['px']), float(l['sz'])) for l in bids]
+        self.ask_levels = [(float(l['px']), float(l['sz'])) for l in asks]
+        self.bid_sz = dict(self.bid_levels)
+        self.ask_sz = dict(self.ask_levels)
+        fills = []
+        # bids at or above best ask have been traded through
+        if self.ask_levels and self.bid_pxs:
+            start = bisect.bisect_left(self.bid_pxs, self.ask_levels[0][0])
+            for px in self.bid_pxs[start:]:
+                fills.extend((order, px, order.sz) for order in self.bids[px])
+        if self.bid_levels and self.ask_pxs:
+            end = bisect.bisect_right(self.ask_pxs, self.bid_levels[0][0])
+            for px in self.ask_pxs[:end]:
+                fills.extend((order, px, order.sz) for order in self.asks[px])
+        # size ahead of us can only shrink via cancels, assume they come from behind unless the level is smaller
+        self._shrink_queues(True, self.bid_pxs, self.bids, self.bid_sz, self.bid_levels)
+        self._shrink_queues(False, self.ask_pxs, self.asks, self.ask_sz, self.ask_levels)
+        return fills
+
+    @staticmethod
+    def _shrink_queues(is_bid: bool, pxs: list, levels: dict, visible: dict, book_levels: list):
+        if not book_levels:
+            return
+        worst = book_levels[-1][0]
+        for px in pxs:
+            sz = visible.get(px)
+            if sz is None:
+                # level not shown, only empty if it lies inside the visible depth
+                if (is_bid and px < worst) or (not is_bid and px > worst):
+                    continue
+                sz = 0.0
+            for order in levels[px]:
+                if order.queue_ahead > sz:
+                    order.queue_ahead = sz
+
+    def on_trade(self, is_buy_aggressor: bool, px: float, sz: float) -> list[tuple[PaperOrder, float, float]]:
+        """
+        Match a public trade against resting paper orders.
+        Returns fills (order, px, sz).
+        """
+        fills = []
+        if is_buy_aggressor:
+            # buyer lifted asks, our asks below the print are fully filled
+            pxs, levels = self.ask_pxs, self.asks
+            through = pxs[:bisect.bisect_left(pxs, px)]
+        else:
+            pxs, levels = self.bid_pxs, self.bids
+            through = pxs[bisect.bisect_right(pxs, px):]
+        for level_px in through:
+            fills.extend((order, level_px, order.sz) for order in levels[level_px])
+        queue = levels.get(px)
+        if queue:
+            used = 0.0  # volume taken by our own orders earlier in the queue
+            for order in queue:
+                ahead = order.queue_ahead
+                order.queue_ahead = max(0.0, ahead - sz)
+                fill = min(order.sz, sz - ahead - used)
+                if fill > EPSILON:
+                    fills.append((order, px, fill))
+                    used += fill
+        return fills
+
+
+class PaperExchange:
+    """
+    In-process matching engine simulating Hyperliquid fills from l2Book and trades streams.
+
+    Post-only (Alo) orders are rejected if they would cross, otherwise they rest behind
+    the visible size at their price and only fill once that queue has traded away.
+    Gtc and Ioc orders that cross take liquidity from the visible book.
+    """
+    def __init__(self, usd_balance: float = 10_000.0, maker_fee: float = MAKER_FEE, taker_fee: float = TAKER_FEE):
+        self.cash = usd_balance
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.books = {}       # coin -> PaperBook
+        self.orders = {}      # oid -> PaperOrder
+        self.positions = {}   # coin -> [szi, entry_px]
+        self.marks = {}       # coin -> last mark price
+        self.fees_paid = 0.0
+        self.next_oid = 1
+        self.time = None
+        self.callbacks = []
+
+    def book(self, coin: str) -> PaperBook:
+        book = self.books.get(coin)
+        if book is None:
+            book = self.books[coin] = PaperBook(coin)
+        return book
+
+    def timestamp(self) -> int:
+        """Feed time when replaying, wall clock otherwise"""
+        return self.time if self.time is not None else ms_timestamp()
+
+    def subscribe(self, callback):
+        """Register callback for webData2 style updates"""
+        self.callbacks.append(callback)
+
+    def place(self, coin: str, is_buy: bool, px: float, sz: float, tif: str = 'Alo', reduce_only: bool = False, cloid=None, oid: Optional[int] = None) -> dict:
+        """Place an order, returns status in /exchange response format"""
+        book = self.book(coin)
+        if reduce_only:
+            szi = self.positions.get(coin, (0.0, 0.0))[0]
+            if szi == 0 or (szi > 0) == is_buy:
+                return {'error': 'Reduce only order would increase position.'}
+            sz = min(sz, abs(szi))
+        crosses = (
+            (is_buy and book.best_ask is not None and px >= book.best_ask)
+            or (not is_buy and book.best_bid is not None and px <= book.best_bid)
+        )
+        # oids are only assigned to accepted orders, as on the exchange
+        if tif == 'Alo':
+            if crosses:
+                return {'error': f'Post only order would have immediately matched, bbo was {book.best_bid}@{book.best_ask}. asset={coin}'}
+        elif crosses:
+            filled, notional = self._take(book, is_buy, px, sz)
+            if filled <= EPSILON and tif == 'Ioc':
+                return {'error': 'Order could not immediately match against any resting orders.'}
+            oid = self._assign_oid(oid)
+            if filled > EPSILON:
+                self._apply_fill(coin, is_buy, notional / filled, filled, self.taker_fee)
+                self._emit()
+            sz -= filled
+            if tif == 'Ioc' or sz <= EPSILON:
+                return {'filled': {'totalSz': str(filled), 'avgPx': str(notional / filled), 'oid': oid}}
+        elif tif == 'Ioc':
+            return {'error': 'Order could not immediately match against any resting orders.'}
+        oid = self._assign_oid(oid)
+        order = PaperOrder(oid, coin, is_buy, px, sz, book.visible_size(is_buy, px), reduce_only, cloid, self.timestamp())
+        book.add(order)
+        self.orders[oid] = order
+        logger.debug(f"Paper order resting: {order.to_wire()}, queue ahead {order.queue_ahead}")
+        return {'resting': {'oid': oid}}
+
+    def _assign_oid(self, oid: Optional[int]) -> int:
+        if oid is None:
+            oid = self.next_oid
+            self.next_oid += 1
+        return oid
+
+    def cancel(self, oid: int) -> bool:
+        """Cancel a resting order"""
+        order = self.orders.pop(oid, None)
+        if order is None:
+            return False
+        self.books[order.coin].remove(order)
+        return True
+
+    def modify(self, oid: int, coin: str, is_buy: bool, px: float, sz: float, tif: str = 'Alo', reduce_only: bool = False, cloid=None) -> dict:
+        """Modify a resting order, which loses its queue position like on the exchange"""
+        if not self.cancel(oid):
+            return {'error': 'Cannot modify canceled or filled order'}
+        return self.place(coin, is_buy, px, sz, tif, reduce_only, cloid, oid=oid)
+
+    def open_orders(self) -> list[dict]:
+        return [order.to_wire() for order in self.orders.values()]
+
+    def on_l2book(self, msg: dict):
+        """Callback for l2Book websocket messages"""
+        data = msg['data']
+        self.time = data.get('time', self.time)
+        book = self.book(data['coin'])
+        bids, asks = data['levels']
+        fills = book.on_levels(bids, asks)
+        if book.mid is not None:
+            self.marks[book.coin] = book.mid
+        self._process_fills(fills)
+
+    def on_trades(self, msg: dict):
+        """Callback for trades websocket messages"""
+        fills = []
+        for trade in msg['data']:
+            self.time = trade.get('time', self.time)
+            px = float(trade['px'])
+            self.marks.setdefault(trade['coin'], px)
+            fills.extend(self.book(trade['coin']).on_trade(trade['side'] == 'B', px, float(trade['sz'])))
+        self._process_fills(fills)
+
+    def replay(self, messages):
+        """Feed recorded websocket messages through the engine"""
+        for msg in messages:
+            channel = msg.get('channel')
+            if channel == 'l2Book':
+                self.on_l2book(msg)
+            elif channel == 'trades':
+                self.on_trades(msg)
+
+    def clearinghouse_state(self) -> dict:
+        """Account state in clearinghouseState format"""
+        asset_positions = []
+        unrealized = 0.0
+        ntl = 0.0
+        signed_ntl = 0.0
+        for coin, (szi, entry_px) in self.positions.items():
+            if szi == 0:
+                continue
+            mark = self.marks.get(coin, entry_px)
+            pnl = szi * (mark - entry_px)
+            unrealized += pnl
+            ntl += abs(szi) * mark
+            signed_ntl += szi * mark
+            asset_positions.append({
+                'type': 'oneWay',
+                'position': {
+                    'coin': coin,
+                    'szi': str(szi),
+                    'entryPx': str(entry_px),
+                    'positionValue': str(abs(szi) * mark),
+                    'unrealizedPnl': str(pnl),
+                },
+            })
+        account_value = self.cash + unrealized
+        return {
+            'assetPositions': asset_positions,
+            'marginSummary': {
+                'accountValue': str(account_value),
+                'totalNtlPos': str(ntl),
+                'totalRawUsd': str(account_value - signed_ntl),
+            },
+            'withdrawable': str(account_value - ntl),
+            'time': self.timestamp(),
+        }
+
+    def _take(self, book: PaperBook, is_buy: bool, px: float, sz: float) -> tuple[float, float]:
+        """
+        Take visible liquidity up to limit price, returns (filled size, notional).
+        Taken size is removed from the visible book until the next snapshot replaces it.
+        """
+        levels, visible = (book.ask_levels, book.ask_sz) if is_buy else (book.bid_levels, book.bid_sz)
+        filled = notional = 0.0
+        while levels and filled < sz - EPSILON:
+            level_px, level_sz = levels[0]
+            if (is_buy and level_px > px) or (not is_buy and level_px < px):
+                break
+            take = min(level_sz, sz - filled)
+            filled += take
+            notional += take * level_px
+            if level_sz - take <= EPSILON:
+                levels.pop(0)
+                del visible[level_px]
+            else:
+                levels[0] = (level_px, level_sz - take)
+                visible[level_px] = level_sz - take
+        return filled, notional
+
+    def _process_fills(self, fills: list):
+        if not fills:
+            return
+        for order, px, sz in fills:
+            if order.oid not in self.orders:
+                continue  # fully filled earlier in this batch
+            sz = min(sz, order.sz)
+            order.sz -= sz
+            self._apply_fill(order.coin, order.is_buy, px, sz, self.maker_fee)
+            logger.debug(f"Paper fill: {order.coin} {'B' if order.is_buy else 'A'} {sz}@{px}, oid {order.oid}")
+            if order.sz <= EPSILON:
+                self.cancel(order.oid)
+        self._emit()
+
+    def _apply_fill(self, coin: str, is_buy: bool, px: float, sz: float, fee_rate: float):
+        szi, entry_px = self.positions.get(coin, (0.0, 0.0))
+        signed = sz if is_buy else -sz
+        new_szi = szi + signed
+        if szi == 0 or (szi > 0) == is_buy:
+            entry_px = (entry_px * abs(szi) + px * sz) / abs(new_szi)
+        else:
+            closed = min(abs(szi), sz)
+            self.cash += closed * (px - entry_px) * (1 if szi > 0 else -1)
+            if abs(new_szi) <= EPSILON:
+                new_szi, entry_px = 0.0, 0.0
+            elif (new_szi > 0) != (szi > 0):
+                entry_px = px
+        fee = px * sz * fee_rate
+        self.cash -= fee
+        self.fees_paid += fee
+        self.positions[coin] = [new_szi, entry_px]
+
+    def _emit(self):
+        msg = {'channel': 'webData2', 'data': {'clearinghouseState': self.clearinghouse_state()}}
+        for callback in self.callbacks:
+            callback(msg)
+
+
+class PaperHyperliquidAsync(HyperliquidAsync):
+    """
+    Hyperliquid client that routes order actions to an in-process PaperExchange.
+    Info endpoints other than account state still hit the live API.
+    """
+    def __init__(self, usd_balance: float = 10_000.0, maker_fee: float = MAKER_FEE, taker_fee: float = TAKER_FEE, **kwargs):
+        super().__init__(**kwargs)
+        self.exchange = PaperExchange(usd_balance, maker_fee, taker_fee)
+        self.asset_to_coin = {}
+
+    async def load_universe(self):
+        """Map asset ids used in order actions to coin names"""
+        universe = (await self.meta())['universe']
+        self.asset_to_coin = {i: item['name'] for i, item in enumerate(universe)}
+
+    async def attach(self, ws, coins: list[str]):
+        """Feed the paper exchange from live l2Book and trades subscriptions"""
+        for coin in coins:
+            await ws.subscribe({'type': 'l2Book', 'coin': coin}, self.exchange.on_l2book)
+            await ws.subscribe({'type': 'trades', 'coin': coin}, self.exchange.on_trades)
+
+    def subscribe_positions(self, callback):
+        """Register callback for webData2 style position updates"""
+        self.exchange.subscribe(callback)
+
+    async def start(self, ws, coins: list[str], on_positions):
+        """
+        Wire a bot to the paper exchange in place of the live account:
+        feed it coins' books and trades, and send position updates to on_positions,
+        starting with the initial account state.
+        """
+        await self.load_universe()
+        await self.attach(ws, coins)
+        self.subscribe_positions(on_positions)
+        on_positions({'channel': 'webData2', 'data': {'clearinghouseState': self.exchange.clearinghouse_state()}})
+
+    async def user_state(self, spot: bool = False):
+        return self.exchange.clearinghouse_state()
+
+    async def open_orders(self):
+        return self.exchange.open_orders()
+
+    async def bulk_orders(self, orders: list[dict]):
+        if not self.asset_to_coin:
+            await self.load_universe()
+        statuses = []
+        for order in orders:
+            statuses.append(self.exchange.place(
+                self.asset_to_coin[order['a']],
+                order['b'],
+                float(order['p']),
+                float(order['s']),
+                order['t']['limit']['tif'],
+                order['r'],
+                order.get('c'),
+            ))
+        return {'status': 'ok', 'response': {'type': 'order', 'data': {'statuses': statuses}}}
+
+    async def modify_order(self, oid: int, coin: int, is_buy: bool, price: float, size: float, reduce_only: bool = False, time_in_force: str = 'Alo', cloid: Optional[int] = None):
+        if not self.asset_to_coin:
+            await self.load_universe()
+        status = self.exchange.modify(oid, self.asset_to_coin[coin], is_buy, price, size, time_in_force, reduce_only, cloid)
+        if 'error' in status:
+            return {'status': 'err', 'response': status['error']}
+        return {'status': 'ok', 'response': {'type': 'default'}}
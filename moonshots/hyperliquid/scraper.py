@@ -2,55 +2,35 @@ import asyncio
 import logging
 import time
 import os
-from typing import Optional
-
-import uvloop
-import pandas as pd
-from aiolimiter import AsyncLimiter
-from tqdm.asyncio import tqdm_asyncio
+from typing import Optional, TYPE_CHECKING
 
 from moonshots.hyperliquid.constants import MAINNET_WS_URL, MAINNET_API_URL
 from moonshots.hyperliquid.client import HyperliquidAsync
 from moonshots.hyperliquid.websocket_manager import WebsocketManager
-from moonshots.hyperliquid.pandas_utils import parse_candles_to_pandas
+
+if TYPE_CHECKING:
+    from moonshots.hyperliquid.hub import MarketDataHub
+    from moonshots.storage import SegmentArchiver
+
+# pandas, tqdm and the hub are only needed by historical/batch paths, so the live recorder
+# imports them lazily and starts listening without paying for them
 
 class Scraper(HyperliquidAsync):
     """
-    Scraping functionality for Hyperliquid, both historical and live.
+    Scraping functionality for Hyperliquid, both historical (historical_candles, inherited from HyperliquidAsync) and live.
     """
-    def __init__(self):
+    def __init__(self, hub: Optional['MarketDataHub'] = None):
         super().__init__()
+        self.hub = hub
         self.ws = None
         self.data = []
         self.logger = logging.getLogger(__name__)
 
-    async def historical_candles(
-            self, 
-            coins: Optional[list[str]] = None, 
-            spot: bool = False, 
-            interval: str = "1h", 
-            parse_pandas: bool = True,
-            requests_per_minute: int = 60,
-            start: Optional[str] = None,
-            end: Optional[str] = None
-            ):
-        """
-        Retrieve historical candles for a list of coins, or whole universe if coins not given.
-        """
-        if coins is None:
-            meta = await self.meta(spot)
-            coins = [item['name'] for item in meta['universe']]
-        async with AsyncLimiter(requests_per_minute, 60):
-            self.logger.debug(f"Retrieving historical candles for {len(coins)} coins with {self.MAX_REQUESTS_PER_MINUTE} requests per minute.")
-            candle_snapshots = await tqdm_asyncio.gather(*[self.candle_snapshot(coin, interval, start, end) for coin in coins])
-        flat_candle_snapshots = [item for sublist in candle_snapshots for item in sublist]
-        return parse_candles_to_pandas(flat_candle_snapshots) if parse_pandas else flat_candle_snapshots
-
     async def connect_ws(self):
         """
         Connect to Hyperliquid websocket
         """
-        self.ws = await WebsocketManager().connect()
+        self.ws = await (self.hub or WebsocketManager()).connect()
     
     async def subscribe_to_mids(self):
         """
@@ -62,37 +42,89 @@ class Scraper(HyperliquidAsync):
         """
         Callback for mids updates
         """
-        mids: dict = msg['data']['mids']
-        mids.update({"time": int(time.time()*1000)})
-        self.data.append(mids)
+        # messages may be shared with other hub consumers, so copy rather than mutate
+        row = dict(msg['data']['mids'], time=int(time.time()*1000))
+        self.data.append(row)
 
-    async def periodic_save(self, save_path: str):
+    async def periodic_save(self, save_path: str, archiver: Optional['SegmentArchiver'] = None, rotate_interval: int = 3600, save_interval: float = 10):
         """
-        Periodically save mids to CSV
+        Periodically save mids to CSV.
+        With an archiver, writes time stamped segments next to save_path and hands each one
+        to the archiver once it has been open for rotate_interval seconds.
+        When cancelled, saves remaining mids, archives the open segment and closes the archiver.
         """
-        while True:
-            await asyncio.sleep(10)
+        segment = None  # [path, start, end, rows, opened]
+        try:
+            while True:
+                await asyncio.sleep(save_interval)
+                try:
+                    segment = await self.flush(save_path, archiver, segment)
+                    # rotate on wall clock time so quiet periods are still archived promptly
+                    if segment is not None and time.time() - segment[4] >= rotate_interval:
+                        archiver.submit(*segment[:4])
+                        segment = None
+                except Exception as e:
+                    self.logger.error(f"Error saving data: {e}")
+        finally:
             try:
-                if self.data:
-                    df = pd.DataFrame(self.data)
-                    file_exists = os.path.isfile(save_path)
-                    df.to_csv(save_path, mode='a', index=False, header = not file_exists)
-                    self.logger.info("Saved mids to mids.csv")
-                    self.data = []
+                segment = await self.flush(save_path, archiver, segment)
             except Exception as e:
-                self.logger.error(f"Error saving data: {e}")
+                self.logger.error(f"Error saving data on shutdown: {e}")
+            if archiver is not None:
+                if segment is not None:
+                    archiver.submit(*segment[:4])
+                await asyncio.to_thread(archiver.close)
+
+    async def flush(self, save_path: str, archiver: Optional['SegmentArchiver'] = None, segment: Optional[list] = None) -> Optional[list]:
+        """
+        Append buffered mids to save_path, or with an archiver to the open segment, opening one if needed.
+        Rows stay buffered if the write fails. Returns the open segment.
+        """
+        if not self.data:
+            return segment
+        if archiver is not None and segment is None:
+            root, ext = os.path.splitext(save_path)
+            start = self.data[0]['time']
+            segment = [f'{root}-{start}{ext}', start, start, 0, time.time()]
+        path = save_path if segment is None else segment[0]
+        data, self.data = self.data, []
+        # write off the event loop so the websocket keeps being read
+        try:
+            await asyncio.to_thread(self.append_csv, data, path)
+        except Exception:
+            # put rows back ahead of any received meanwhile, the next save retries them
+            self.data = data + self.data
+            raise
+        if segment is not None:
+            segment[2] = data[-1]['time']
+            segment[3] += len(data)
+        self.logger.info(f"Saved {len(data)} mids to {path}")
+        return segment
+
+    @staticmethod
+    def append_csv(data: list[dict], path: str):
+        """Append rows to CSV, writing header if file is new"""
+        import pandas as pd
+        df = pd.DataFrame(data)
+        file_exists = os.path.isfile(path)
+        df.to_csv(path, mode='a', index=False, header = not file_exists)
 
-    async def live_scrape_mids(self, save_path: str):
+    async def live_scrape_mids(self, save_path: str, archiver: Optional['SegmentArchiver'] = None, rotate_interval: int = 3600):
         """
-        Live scrape mids and save to CSV periodically
+        Live scrape mids and save to CSV periodically, archiving rotated segments if given an archiver
         """
         await self.connect_ws()
         await self.subscribe_to_mids()
-        await asyncio.create_task(self.periodic_save(save_path))
+        await asyncio.create_task(self.periodic_save(save_path, archiver, rotate_interval))
 
 if __name__=="__main__":
+    import uvloop
+    from moonshots.storage import SegmentArchiver, storage_from_url
     DATA_DIR = '../../../data/'
     logging.basicConfig(level=logging.INFO)
     scraper = Scraper()
     save_path = os.path.join(DATA_DIR, "mids.csv")
-    uvloop.run(scraper.live_scrape_mids(save_path))
\ No newline at end of file
+    # e.g. ARCHIVE_URL=s3://bucket/prefix, or a local directory
+    archive_url = os.getenv("ARCHIVE_URL")
+    archiver = SegmentArchiver(storage_from_url(archive_url), "mids") if archive_url else None
+    uvloop.run(scraper.live_scrape_mids(save_path, archiver))
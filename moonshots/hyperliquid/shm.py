@@ -0,0 +1,386 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import uvloop
+
+from moonshots.hyperliquid.api import API
+from moonshots.hyperliquid.coins import CoinIndex
+from moonshots.hyperliquid.decode import FrameDecoder
+from moonshots.hyperliquid.websocket_manager import WebsocketManager
+from moonshots.utils.time import ms_timestamp
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x4D4F4F4E  # "MOON"
+NAME_LEN = 16
+ALIGN = 64
+
+# header slots
+H_MAGIC, H_CAPACITY, H_RING_SIZE, H_DEPTH, H_WRITE_SEQ, H_MIDS_SEQ, H_N_COINS, H_HEARTBEAT = range(8)
+HEADER_SLOTS = 8
+
+# seqlock retries before a reader gives up on a writer that died mid-write
+MAX_SPINS = 1_000_000
+# writer heartbeat interval (s) and age (ms) after which readers consider it dead
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 5000
+
+# record kinds
+MID, TRADE, BOOK = 0, 1, 2
+
+RECORD_DTYPE = np.dtype([
+    ('seq', 'u8'),
+    ('time', 'i8'),
+    ('coin', 'i4'),
+    ('kind', 'i2'),
+    ('side', 'i2'),  # 1 buy aggressor, -1 sell aggressor, 0 n/a
+    ('px', 'f8'),
+    ('sz', 'f8'),
+])
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _layout(capacity: int, ring_size: int, depth: int) -> tuple[dict, int]:
+    """Byte offsets of each region, shared by writer and readers"""
+    regions = [
+        ('header', HEADER_SLOTS * 8),
+        ('names', capacity * NAME_LEN),
+        ('mids', capacity * 8),
+        ('book_seq', capacity * 8),
+        ('books', capacity * 2 * depth * 2 * 8),
+        ('ring', ring_size * RECORD_DTYPE.itemsize),
+    ]
+    offsets = {}
+    size = 0
+    for name, nbytes in regions:
+        offsets[name] = size
+        size += _align(nbytes)
+    return offsets, size
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to existing segment without the resource tracker unlinking it when we exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class MarketDataBuffer:
+    """
+    Fixed layout market data region in shared memory.
+
+    header | coin names | latest mids | per coin book seqs | books [coin, side, level, (px, sz)] | record ring
+
+    Latest-value regions are guarded by seqlocks (odd while being written), ring records carry
+    their own sequence number so readers can detect being lapped by the writer.
+    The writer stamps a heartbeat (ms) into the header so readers can tell when it has died.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, ring_size: int, depth: int):
+        self.shm = shm
+        self.capacity = capacity
+        self.ring_size = ring_size
+        self.depth = depth
+        offsets, _ = _layout(capacity, ring_size, depth)
+        buf = shm.buf
+        self.header = np.ndarray(HEADER_SLOTS, dtype=np.int64, buffer=buf, offset=offsets['header'])
+        self.names = np.ndarray(capacity, dtype=f'S{NAME_LEN}', buffer=buf, offset=offsets['names'])
+        self.mids = np.ndarray(capacity, dtype=np.float64, buffer=buf, offset=offsets['mids'])
+        self.book_seq = np.ndarray(capacity, dtype=np.int64, buffer=buf, offset=offsets['book_seq'])
+        self.books = np.ndarray((capacity, 2, depth, 2), dtype=np.float64, buffer=buf, offset=offsets['books'])
+        self.ring = np.ndarray(ring_size, dtype=RECORD_DTYPE, buffer=buf, offset=offsets['ring'])
+
+    @classmethod
+    def create(cls, name: Optional[str] = None, capacity: int = 512, ring_size: int = 1 << 16, depth: int = 10):
+        """Create a new segment, owned by the writer"""
+        _, size = _layout(capacity, ring_size, depth)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        buffer = cls(shm, capacity, ring_size, depth)
+        buffer.header[:] = 0
+        buffer.mids[:] = np.nan
+        buffer.books[:] = np.nan
+        buffer.book_seq[:] = 0
+        buffer.ring['seq'] = 0
+        buffer.header[H_CAPACITY] = capacity
+        buffer.header[H_RING_SIZE] = ring_size
+        buffer.header[H_DEPTH] = depth
+        buffer.header[H_MAGIC] = MAGIC
+        return buffer
+
+    @classmethod
+    def attach(cls, name: str):
+        """Attach to a segment created by another process"""
+        shm = _attach(name)
+        header = np.ndarray(HEADER_SLOTS, dtype=np.int64, buffer=shm.buf)
+        if header[H_MAGIC] != MAGIC:
+            raise ValueError(f"Shared memory segment {name} is not a market data buffer")
+        return cls(shm, int(header[H_CAPACITY]), int(header[H_RING_SIZE]), int(header[H_DEPTH]))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        """Release views and detach from segment"""
+        del self.header, self.names, self.mids, self.book_seq, self.books, self.ring
+        self.shm.close()
+
+
+class ShmPublisher:
+    """Single writer publishing decoded websocket messages into a MarketDataBuffer"""
+    def __init__(self, buffer: MarketDataBuffer, coins: Optional[CoinIndex] = None):
+        self.buffer = buffer
+        self.coins = coins if coins is not None else CoinIndex()
+
+    def coin_index(self, coin: str) -> int:
+        """Index for coin, publishing its name before readers can see it"""
+        idx = self.coins.get(coin)
+        self.sync_names()
+        return idx
+
+    def sync_names(self):
+        """Publish names of coins added to the index since the last sync"""
+        n = int(self.buffer.header[H_N_COINS])
+        if n == len(self.coins):
+            return
+        if len(self.coins) > self.buffer.capacity:
+            raise ValueError(f"Shared memory buffer full, cannot add {len(self.coins) - self.buffer.capacity} coins")
+        for idx in range(n, len(self.coins)):
+            self.buffer.names[idx] = self.coins.coins[idx].encode()[:NAME_LEN]
+        self.buffer.header[H_N_COINS] = len(self.coins)
+
+    def heartbeat(self):
+        """Mark the writer alive"""
+        self.buffer.header[H_HEARTBEAT] = ms_timestamp()
+
+    def write_records(self, coin: np.ndarray, kind: int, time: int, px: np.ndarray, sz: np.ndarray = None, side: np.ndarray = None):
+        """Append records to the ring, sequence numbers are written last so readers never see partial records"""
+        buf = self.buffer
+        n = len(coin)
+        if n == 0:
+            return
+        if n > buf.ring_size:
+            coin, px = coin[-buf.ring_size:], px[-buf.ring_size:]
+            sz = sz[-buf.ring_size:] if sz is not None else None
+            side = side[-buf.ring_size:] if side is not None else None
+            n = buf.ring_size
+        start = int(buf.header[H_WRITE_SEQ])
+        seqs = np.arange(start + 1, start + n + 1, dtype=np.uint64)
+        pos = (seqs - 1) % buf.ring_size
+        ring = buf.ring
+        ring['seq'][pos] = 0
+        ring['time'][pos] = time
+        ring['coin'][pos] = coin
+        ring['kind'][pos] = kind
+        ring['side'][pos] = 0 if side is None else side
+        ring['px'][pos] = px
+        ring['sz'][pos] = 0.0 if sz is None else sz
+        ring['seq'][pos] = seqs
+        buf.header[H_WRITE_SEQ] = start + n
+        self.heartbeat()
+
+    def publish_mids(self, idx: np.ndarray, px: np.ndarray, time: int):
+        """Update latest mids and append a record for every coin whose mid changed"""
+        buf = self.buffer
+        self.sync_names()
+        changed = buf.mids[idx] != px
+        buf.header[H_MIDS_SEQ] += 1
+        buf.mids[idx] = px
+        buf.header[H_MIDS_SEQ] += 1
+        self.write_records(idx[changed], MID, time, px[changed])
+
+    def publish_book(self, idx: int, book: np.ndarray, time: int):
+        """Update latest book [side, level, (px, sz)] for coin and append a record with its mid"""
+        buf = self.buffer
+        self.sync_names()
+        depth = min(buf.depth, book.shape[1])
+        buf.book_seq[idx] += 1
+        buf.books[idx] = np.nan
+        buf.books[idx, :, :depth] = book[:, :depth]
+        buf.book_seq[idx] += 1
+        self.write_records(np.array([idx]), BOOK, time, np.array([(book[0, 0, 0] + book[1, 0, 0]) / 2]))
+
+    def publish_trades(self, trades: list):
+        """Append a record per trade"""
+        if not trades:
+            return
+        coin = np.array([self.coin_index(t['coin']) for t in trades])
+        px = np.array([t['px'] for t in trades], dtype=np.float64)
+        sz = np.array([t['sz'] for t in trades], dtype=np.float64)
+        side = np.array([1 if t['side'] == 'B' else -1 for t in trades])
+        self.write_records(coin, TRADE, trades[-1]['time'], px, sz, side)
+
+
+class ShmReader:
+    """
+    Attach to a MarketDataBuffer from a strategy process.
+
+    `poll` returns views straight into the ring, valid until the writer laps them,
+    so consume them before the next poll.
+    """
+    def __init__(self, name: str, start_at_end: bool = True, max_spins: int = MAX_SPINS):
+        self.buffer = MarketDataBuffer.attach(name)
+        self.last_seq = int(self.buffer.header[H_WRITE_SEQ]) if start_at_end else 0
+        self.max_spins = max_spins
+        self.overruns = 0
+
+    @property
+    def coins(self) -> list[str]:
+        n = int(self.buffer.header[H_N_COINS])
+        return [name.decode() for name in self.buffer.names[:n]]
+
+    @property
+    def heartbeat_age(self) -> int:
+        """Milliseconds since the writer last published or heartbeated"""
+        return ms_timestamp() - int(self.buffer.header[H_HEARTBEAT])
+
+    def writer_alive(self, max_age_ms: int = HEARTBEAT_TIMEOUT) -> bool:
+        return self.heartbeat_age <= max_age_ms
+
+    def _stuck(self, region: str):
+        """Raise once a seqlock has been odd for max_spins retries"""
+        state = 'alive' if self.writer_alive() else f'dead for {self.heartbeat_age}ms'
+        raise TimeoutError(f"{region} seqlock held for {self.max_spins} retries, writer {state}")
+
+    @property
+    def mids(self) -> np.ndarray:
+        """Live view of latest mids, may be mid-update. Use read_mids for a consistent snapshot."""
+        return self.buffer.mids[:int(self.buffer.header[H_N_COINS])]
+
+    def read_mids(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Consistent snapshot of latest mids into out"""
+        buf = self.buffer
+        for _ in range(self.max_spins):
+            seq = buf.header[H_MIDS_SEQ]
+            if seq & 1:
+                continue
+            n = int(buf.header[H_N_COINS])
+            if out is None or len(out) < n:
+                out = np.empty(n)
+            out[:n] = buf.mids[:n]
+            if buf.header[H_MIDS_SEQ] == seq:
+                return out[:n]
+        self._stuck('mids')
+
+    def read_book(self, coin_idx: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Consistent snapshot of latest book [side, level, (px, sz)] for a coin"""
+        buf = self.buffer
+        if out is None:
+            out = np.empty((2, buf.depth, 2))
+        for _ in range(self.max_spins):
+            seq = buf.book_seq[coin_idx]
+            if seq & 1:
+                continue
+            out[:] = buf.books[coin_idx]
+            if buf.book_seq[coin_idx] == seq:
+                return out
+        self._stuck(f'book {coin_idx}')
+
+    def poll(self) -> np.ndarray:
+        """Records written since last poll, as a zero copy view (at most up to the ring wrap point)"""
+        buf = self.buffer
+        write_seq = int(buf.header[H_WRITE_SEQ])
+        if write_seq == self.last_seq:
+            return buf.ring[:0]
+        oldest = write_seq - buf.ring_size + 1
+        if self.last_seq + 1 < oldest:
+            self.overruns += oldest - self.last_seq - 1
+            logger.warning(f"Reader lapped by writer, skipped {oldest - self.last_seq - 1} records")
+            self.last_seq = oldest - 1
+        start = self.last_seq % buf.ring_size
+        end = min(start + write_seq - self.last_seq, buf.ring_size)
+        records = buf.ring[start:end]
+        # writer may have lapped us while slicing, trust only records with the expected sequence
+        expected = np.arange(self.last_seq + 1, self.last_seq + 1 + len(records), dtype=np.uint64)
+        valid = records['seq'] == expected
+        if not valid.all():
+            n_valid = int(valid.argmin())
+            self.overruns += len(records) - n_valid
+            records = records[:n_valid]
+        self.last_seq += len(records)
+        return records
+
+    async def stream(self, interval: float = 0.001):
+        """Async generator of record batches"""
+        while True:
+            records = self.poll()
+            if len(records):
+                yield records
+            else:
+                await asyncio.sleep(interval)
+
+    def close(self):
+        self.buffer.close()
+
+
+class IngestionProcess(multiprocessing.Process):
+    """
+    Runs the websocket in its own process, decoding messages into a shared MarketDataBuffer
+    so strategies in other processes are not slowed by message handling or each other.
+    """
+    def __init__(self, name: str, book_coins: list[str] = (), trade_coins: list[str] = (), capacity: int = 512, ring_size: int = 1 << 16, depth: int = 10, ws_url: Optional[str] = None):
+        super().__init__(daemon=True)
+        self.buffer = MarketDataBuffer.create(name, capacity, ring_size, depth)
+        self.shm_name = self.buffer.name
+        self.book_coins = list(book_coins)
+        self.trade_coins = list(trade_coins)
+        self.ws_url = ws_url
+
+    def __getstate__(self):
+        # child re-attaches by name rather than pickling views of the parent's mapping
+        state = self.__dict__.copy()
+        del state['buffer']
+        return state
+
+    def run(self):
+        if not hasattr(self, 'buffer'):
+            self.buffer = MarketDataBuffer.attach(self.shm_name)
+        uvloop.run(self.ingest())
+
+    async def ingest(self):
+        publisher = ShmPublisher(self.buffer)
+        publisher.heartbeat()
+        # index perps in universe order so coin index matches asset id
+        api = API()
+        for item in (await api.post('/info', {'type': 'meta'}))['universe']:
+            publisher.coin_index(item['name'])
+        await api.close()
+        decoder = FrameDecoder(publisher.coins, self.buffer.capacity, self.buffer.depth)
+        ws = await WebsocketManager(self.ws_url, decoder=decoder).connect()
+        await ws.subscribe({'type': 'allMids'}, lambda msg: publisher.publish_mids(msg['idx'], decoder.mids[msg['idx']], ms_timestamp()))
+        for coin in self.book_coins:
+            await ws.subscribe({'type': 'l2Book', 'coin': coin}, lambda msg: publisher.publish_book(msg['idx'], decoder.books[msg['idx']], msg['data']['time']))
+        for coin in self.trade_coins:
+            await ws.subscribe({'type': 'trades', 'coin': coin}, lambda msg: publisher.publish_trades(msg['data']))
+        logger.info(f"Ingesting into shared memory {self.shm_name}")
+        # keep the heartbeat fresh while markets are quiet
+        while True:
+            publisher.heartbeat()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    def unlink(self):
+        """Free the shared memory segment, call from the owning process once readers are done"""
+        self.buffer.shm.close()
+        self.buffer.shm.unlink()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    process = IngestionProcess('moonshots_md', book_coins=sys.argv[1:], trade_coins=sys.argv[1:])
+    process.start()
+    try:
+        process.join()
+    finally:
+        process.unlink()
@@ -1,10 +1,12 @@
+from __future__ import annotations
+
 import logging
 from decimal import Decimal
+from typing import TYPE_CHECKING
 
-import msgpack
-from eth_utils import keccak, to_hex
-from eth_account.messages import encode_structured_data
-from eth_account.signers.local import LocalAccount
+# eth and msgpack imports are deferred to signing time, so read-only clients never pay for them
+if TYPE_CHECKING:
+    from eth_account.signers.local import LocalAccount
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,8 @@ def float_to_wire(x: float) -> str:
     return f"{normalized:f}"
 
 def action_hash(action, vault_address, nonce: int):
+    import msgpack
+    from eth_utils import keccak
     data = msgpack.packb(action)
     data += nonce.to_bytes(8, "big")
     if vault_address is None:
@@ -39,6 +43,8 @@ def action_hash(action, vault_address, nonce: int):
     return keccak(data)
 
 def sign_inner(wallet: LocalAccount, data):
+    from eth_utils import to_hex
+    from eth_account.messages import encode_structured_data
     structured_data = encode_structured_data(data)
     signed = wallet.sign_message(structured_data)
     return {"r": to_hex(signed["r"]), "s": to_hex(signed["s"]), "v": signed["v"]}
@@ -1,4 +1,5 @@
 import asyncio
+import inspect
 import websockets
 import logging
 
@@ -9,15 +10,19 @@ logger = logging.getLogger(__name__)
 
 class WebsocketManager:
     """Async Websocket Manager for Hyperliquid"""
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, decoder = None):
         self.base_url = base_url or MAINNET_WS_URL
+        self.decoder = decoder
         self.ws = None
+        self.recv_bytes = False
         self.id_to_sub = {}
         self.id_to_callback = {}
 
     async def connect(self):
         """Connect to websocket"""
         self.ws = await websockets.connect(self.base_url)
+        # receive raw bytes where supported so frames go to the JSON parser without re-encoding
+        self.recv_bytes = 'decode' in inspect.signature(self.ws.recv).parameters
         logger.debug("Websocket connected")
         self.ws_ready = True
         asyncio.create_task(self.send_ping())
@@ -46,6 +51,14 @@ class WebsocketManager:
         logger.debug(f"Subscribed to {subscription} with callback {callback}")
         return id
 
+    async def unsubscribe(self, subscription: dict):
+        """Unsubscribe from a websocket channel"""
+        id = self.subscription_to_identifier(subscription)
+        self.id_to_sub.pop(id, None)
+        self.id_to_callback.pop(id, None)
+        logger.debug(f"Unsubscribing from {subscription}")
+        await self.ws.send(dumps({"method" : "unsubscribe", "subscription" : subscription}))
+
     async def post(self, id, request, callback):
         """Post request to websocket"""
         self.id_to_callback[id] = callback
@@ -58,9 +71,9 @@ class WebsocketManager:
         logger.debug("Websocket listening...")
         while True:
             try:
-                msg = await self.ws.recv()
+                msg = await (self.ws.recv(decode=False) if self.recv_bytes else self.ws.recv())
                 try:
-                    msg = loads(msg)
+                    msg = self.decoder.decode(msg) if self.decoder else loads(msg)
                 except Exception as e:
                     logger.error(f"Could not decode msg to JSON: {msg}")
                     continue
@@ -0,0 +1,256 @@
+import bisect
+import logging
+import os
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from moonshots.utils.json import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+class StorageBackend(ABC):
+    """Minimal object store interface used for archiving recorder output"""
+
+    @abstractmethod
+    def put_file(self, local_path: str, key: str):
+        ...
+
+    @abstractmethod
+    def get_file(self, key: str, local_path: str):
+        ...
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes):
+        ...
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Object contents, or None if it doesn't exist"""
+        ...
+
+
+class LocalStorage(StorageBackend):
+    """Store objects as files under a root directory"""
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put_file(self, local_path: str, key: str):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # copy alongside then rename, so readers never see partial objects
+        shutil.copyfile(local_path, f'{path}.tmp')
+        os.replace(f'{path}.tmp', path)
+
+    def get_file(self, key: str, local_path: str):
+        shutil.copyfile(self.path(key), local_path)
+
+    def put_bytes(self, key: str, data: bytes):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(f'{path}.tmp', path)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class S3Storage(StorageBackend):
+    """
+    Store objects in an S3 compatible bucket (AWS, MinIO, moto).
+    Large files are uploaded as parallel multipart uploads, failed requests are retried by botocore.
+    """
+    def __init__(
+            self,
+            bucket: str,
+            prefix: str = '',
+            endpoint_url: Optional[str] = None,
+            max_concurrency: int = 8,
+            multipart_chunksize: int = 16 * 1024 * 1024,
+            max_attempts: int = 5,
+            ):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or os.getenv('S3_ENDPOINT_URL'),
+            config=Config(retries={'max_attempts': max_attempts, 'mode': 'adaptive'}, max_pool_connections=max_concurrency),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunksize,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+            use_threads=True,
+        )
+
+    def s3_key(self, key: str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    def put_file(self, local_path: str, key: str):
+        self.client.upload_file(local_path, self.bucket, self.s3_key(key), Config=self.transfer_config)
+
+    def get_file(self, key: str, local_path: str):
+        self.client.download_file(self.bucket, self.s3_key(key), local_path, Config=self.transfer_config)
+
+    def put_bytes(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self.s3_key(key), Body=data)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.s3_key(key))['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+
+def storage_from_url(url: str) -> StorageBackend:
+    """Backend from 's3://bucket/prefix' or a local directory path"""
+    if url.startswith('s3://'):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        return S3Storage(bucket, prefix)
+    return LocalStorage(url)
+
+
+class Manifest:
+    """
+    Time index of archived segments, stored as JSON lines next to them so
+    readers can find segments by time range without listing the bucket.
+
+    entries: {'key', 'start', 'end', 'rows', 'bytes', 'raw_bytes'}, sorted by start (ms)
+    """
+    def __init__(self, backend: StorageBackend, name: str):
+        self.backend = backend
+        self.key = f'{name}/{MANIFEST_NAME}'
+        self.entries = []
+        self.starts = []
+
+    @classmethod
+    def load(cls, backend: StorageBackend, name: str):
+        manifest = cls(backend, name)
+        data = backend.get_bytes(manifest.key)
+        if data:
+            for line in data.splitlines():
+                manifest.insert(loads(line))
+        return manifest
+
+    def insert(self, entry: dict):
+        i = bisect.bisect_right(self.starts, entry['start'])
+        self.starts.insert(i, entry['start'])
+        self.entries.insert(i, entry)
+
+    def save(self):
+        self.backend.put_bytes(self.key, '\n'.join(dumps(entry) for entry in self.entries).encode())
+
+    def segments(self, start: Optional[int] = None, end: Optional[int] = None) -> list[dict]:
+        """Entries overlapping [start, end]"""
+        hi = len(self.entries) if end is None else bisect.bisect_right(self.starts, end)
+        return [entry for entry in self.entries[:hi] if start is None or entry['end'] >= start]
+
+
+class SegmentArchiver:
+    """
+    Compresses and uploads rotated recorder segments in a background thread pool,
+    so rotation never blocks the event loop receiving websocket messages.
+    Segments that fail to archive stay on disk and are requeued with the next submit or on close.
+    """
+    def __init__(self, backend: StorageBackend, name: str, workers: int = 4, retries: int = 3, delete_local: bool = True):
+        self.backend = backend
+        self.name = name
+        self.retries = retries
+        self.delete_local = delete_local
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix='archiver')
+        self.manifest = Manifest.load(backend, name)
+        self.manifest_lock = threading.Lock()
+        self.failed = []  # segments (path, start, end, rows) awaiting a retry
+        self.failed_lock = threading.Lock()
+
+    def submit(self, path: str, start: int, end: int, rows: int) -> Future:
+        """Queue a closed segment covering [start, end] ms for archival, returns immediately"""
+        self.retry_failed()
+        return self._submit((path, start, end, rows))
+
+    def _submit(self, segment: tuple) -> Future:
+        future = self.pool.submit(self.archive, *segment)
+        future.add_done_callback(lambda f: self._on_done(f, segment))
+        return future
+
+    def _on_done(self, future: Future, segment: tuple):
+        """Keep failed segments for a retry, unless their local file is gone"""
+        e = future.exception()
+        if e is None:
+            return
+        if os.path.exists(segment[0]):
+            logger.error(f"Failed to archive {segment[0]}, will retry: {e}")
+            with self.failed_lock:
+                self.failed.append(segment)
+        else:
+            logger.error(f"Failed to archive {segment[0]}, local file is gone: {e}")
+
+    def retry_failed(self) -> list[Future]:
+        """Requeue segments that previously failed to archive"""
+        with self.failed_lock:
+            failed, self.failed = self.failed, []
+        return [self._submit(segment) for segment in failed]
+
+    def archive(self, path: str, start: int, end: int, rows: int) -> dict:
+        """LZ4 compress segment, upload it with retries and record it in the manifest"""
+        import lz4.frame
+        compressed_path = f'{path}.lz4'
+        with open(path, 'rb') as src, lz4.frame.open(compressed_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        key = f'{self.name}/{start}-{end}{os.path.splitext(path)[1]}.lz4'
+        for attempt in range(1, self.retries + 1):
+            try:
+                self.backend.put_file(compressed_path, key)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.error(f"Giving up uploading {compressed_path} after {attempt} attempts: {e}")
+                    raise
+                logger.warning(f"Upload of {compressed_path} failed ({e}), retrying")
+                time.sleep(2 ** attempt)
+        entry = {
+            'key': key,
+            'start': start,
+            'end': end,
+            'rows': rows,
+            'bytes': os.path.getsize(compressed_path),
+            'raw_bytes': os.path.getsize(path),
+        }
+        with self.manifest_lock:
+            self.manifest.insert(entry)
+            self.manifest.save()
+        if self.delete_local:
+            os.remove(path)
+        os.remove(compressed_path)
+        logger.info(f"Archived {path} to {key}")
+        return entry
+
+    def close(self):
+        """Retry failed segments once more and wait for queued segments to finish"""
+        self.retry_failed()
+        self.pool.shutdown(wait=True)
+        if self.failed:
+            logger.error(f"{len(self.failed)} segments left unarchived on disk: {[segment[0] for segment in self.failed]}")
+
+
+def read_segment(backend: StorageBackend, entry: dict) -> bytes:
+    """Decompressed contents of an archived segment"""
+    import lz4.frame
+    return lz4.frame.decompress(backend.get_bytes(entry['key']))
@@ -3,5 +3,5 @@ import orjson
 def dumps(obj: dict):
     return orjson.dumps(obj).decode()
 
-def loads(s: str):
-    return orjson.loads(s.encode())
\ No newline at end of file
+def loads(s: str | bytes):
+    return orjson.loads(s)
\ No newline at end of file